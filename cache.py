@@ -0,0 +1,61 @@
+# cache.py
+import aiosqlite
+from pathlib import Path
+from typing import Optional
+
+from .config import CACHE_DB, CACHE_COMMIT_BATCH
+
+
+class CacheStore:
+    """
+    Single-file SQLite cache (key -> text body). Replaces one small file
+    per chapter; writes are buffered and committed in batches.
+    """
+
+    def __init__(self, path: Path = CACHE_DB):
+        self.path = path
+        self._db: Optional[aiosqlite.Connection] = None
+        self._pending = 0
+
+    async def open(self):
+        self._db = await aiosqlite.connect(self.path)
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA synchronous=NORMAL")
+        await self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, body TEXT NOT NULL)"
+        )
+        await self._db.commit()
+
+    async def close(self):
+        if self._db is not None:
+            await self.flush()
+            await self._db.close()
+            self._db = None
+
+    async def get(self, key: str) -> Optional[str]:
+        async with self._db.execute(
+            "SELECT body FROM cache WHERE key = ?", (key,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def put(self, key: str, body: str):
+        await self._db.execute(
+            "INSERT OR REPLACE INTO cache (key, body) VALUES (?, ?)", (key, body)
+        )
+        await self._mark_pending()
+
+    async def delete(self, key: str):
+        await self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+        await self._mark_pending()
+
+    async def flush(self):
+        """Commits any buffered writes."""
+        if self._pending:
+            await self._db.commit()
+            self._pending = 0
+
+    async def _mark_pending(self):
+        self._pending += 1
+        if self._pending >= CACHE_COMMIT_BATCH:
+            await self.flush()
@@ -13,10 +13,18 @@ HEADERS = {
     "Referer": "https://novelbin.com/",
 }
 
-MAX_CONCURRENT_REQUESTS = 5  # Limit concurrent connections to avoid bans
+# Requests are multiplexed as HTTP/2 streams over a shared connection, so this
+# is an in-flight ceiling (overload guard) rather than a socket count.
+MAX_CONCURRENT_REQUESTS = 32
+INITIAL_CONCURRENT_REQUESTS = 8  # Adaptive limiter starting point
+ADJUST_WINDOW = 20  # Responses per limiter decision
+ADJUST_OVERLOAD_RATE = 0.1  # 429 ratio that halves concurrency
 REQUEST_TIMEOUT = 30
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # Seconds
+META_CACHE_TTL = 300  # Seconds a parsed novel page is trusted without revalidating
+
+PROGRESS_INTERVAL = 0.05  # Min seconds between progress bar redraws
 
 
 # File Settings
@@ -28,6 +36,8 @@ else:
     DEFAULT_OUTPUT_DIR = Path.home() / "Documents" / "Novels" / "New"
 
 CACHE_DIR = DEFAULT_OUTPUT_DIR / ".cache"
+CACHE_DB = CACHE_DIR / "cache.sqlite3"
+CACHE_COMMIT_BATCH = 50  # Cache writes buffered per SQLite commit
 
 DEFAULT_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 LIBRARY_FILE = DEFAULT_OUTPUT_DIR / "library.json"
@@ -35,6 +45,13 @@ LIBRARY_FILE = DEFAULT_OUTPUT_DIR / "library.json"
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 
+# EPUB Settings
+# Books with more chapters than this skip ebooklib and are written straight
+# to the zip (NCX only, no EPUB3 nav), streaming each chapter from the cache.
+EPUB_DIRECT_WRITE_THRESHOLD = 500
+EPUB_COMPRESS_LEVEL = 1  # Fast deflate; prose barely shrinks further at 6+
+
+
 # EPUB Styling
 CSS_STYLE = """
 @namespace epub "http://www.idpf.org/2007/ops";
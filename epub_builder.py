@@ -1,19 +1,61 @@
 # epub_builder.py
-import requests
+import os
+import zipfile
+from html import escape
 from ebooklib import epub
 from pathlib import Path
-from .config import CSS_STYLE, HEADERS
+from typing import Awaitable, Callable, Optional
+from .config import CSS_STYLE, EPUB_DIRECT_WRITE_THRESHOLD, EPUB_COMPRESS_LEVEL
 from .utils import clean_filename
 
+ContentLoader = Callable[[str], Awaitable[Optional[str]]]
 
-def create_epub(
+CONTAINER_XML = """<?xml version="1.0" encoding="utf-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="EPUB/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+CHAPTER_XHTML = """<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.1//EN" "http://www.w3.org/TR/xhtml11/DTD/xhtml11.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">
+<head>
+  <title>{title}</title>
+  <link href="style.css" rel="stylesheet" type="text/css"/>
+</head>
+<body>
+<h2>{title}</h2>
+{content}
+</body>
+</html>
+"""
+
+
+async def create_epub(
     title: str,
     author: str,
-    cover_url: str,
+    cover_bytes: Optional[bytes],
     description: str,
     chapters: list,
     output_dir: Path,
+    load_content: ContentLoader,
 ):
+    """
+    Builds the EPUB. `chapters` holds {"title", "url"} entries; each body is
+    read through `load_content(url)` only when its chapter is added.
+    """
+    safe_title = clean_filename(title.strip())
+    output_path = output_dir / f"{safe_title}.epub"
+
+    if len(chapters) > EPUB_DIRECT_WRITE_THRESHOLD:
+        await _write_epub_direct(
+            output_path, title, author, cover_bytes, description, chapters, load_content
+        )
+        print(f"\n✅ EPUB successfully saved to: {output_path}")
+        return
+
     book = epub.EpubBook()
 
     # Metadata
@@ -29,33 +71,33 @@ def create_epub(
     )
     book.add_item(css_item)
 
-    # Cover (Synchronous download is acceptable for one file)
-    if cover_url:
-        try:
-            print("🖼️ Downloading cover...")
-            res = requests.get(cover_url, headers=HEADERS, timeout=10)
-            if res.status_code == 200:
-                book.set_cover("cover.jpg", res.content)
-        except Exception as e:
-            print(f"⚠️ Could not download cover: {e}")
-
-    # Chapters
+    # Cover (downloaded by the scraper over the shared async session)
+    if cover_bytes:
+        book.set_cover("cover.jpg", cover_bytes)
+
+    # Chapters (hot loop: bind attribute lookups to locals)
     epub_chapters = []
+    EpubHtml = epub.EpubHtml
+    add_item = book.add_item
+    add_chapter = epub_chapters.append
     for idx, ch in enumerate(chapters, start=1):
+        ch_title = ch["title"]
+        content = await load_content(ch["url"])
+        if content is None:
+            raise ValueError(f"Chapter missing from cache: {ch_title}")
+
         # Create standardized header
         chapter_content = f"""
-            <h2>{ch['title']}</h2>
-            {ch['content']}
+            <h2>{ch_title}</h2>
+            {content}
         """
 
-        c_item = epub.EpubHtml(
-            title=ch["title"], file_name=f"chapter_{idx}.xhtml", lang="en"
-        )
+        c_item = EpubHtml(title=ch_title, file_name=f"chapter_{idx}.xhtml", lang="en")
         c_item.content = chapter_content
         c_item.add_item(css_item)
 
-        book.add_item(c_item)
-        epub_chapters.append(c_item)
+        add_item(c_item)
+        add_chapter(c_item)
 
     # Structure
     book.toc = tuple(epub_chapters)
@@ -64,8 +106,131 @@ def create_epub(
     book.add_item(epub.EpubNav())
 
     # Write
-    safe_title = clean_filename(title.strip())
-    output_path = output_dir / f"{safe_title}.epub"
     epub.write_epub(str(output_path), book)
 
     print(f"\n✅ EPUB successfully saved to: {output_path}")
+
+
+async def _write_epub_direct(
+    output_path: Path,
+    title: str,
+    author: str,
+    cover_bytes: Optional[bytes],
+    description: str,
+    chapters: list,
+    load_content: ContentLoader,
+):
+    """
+    Writes to a temp file and moves it into place only once the book is
+    complete, so a failure never leaves a broken EPUB over a good one.
+    """
+    tmp_path = output_path.with_suffix(".epub.tmp")
+    try:
+        await _write_epub_zip(
+            tmp_path, title, author, cover_bytes, description, chapters, load_content
+        )
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, output_path)
+
+
+async def _write_epub_zip(
+    zip_path: Path,
+    title: str,
+    author: str,
+    cover_bytes: Optional[bytes],
+    description: str,
+    chapters: list,
+    load_content: ContentLoader,
+):
+    """
+    Writes an EPUB 2 container by hand for very large books: each chapter is
+    read from the cache and written to the zip immediately, so only one
+    chapter is held in memory, and the OPF/NCX are plain string templates.
+    """
+    identifier = escape(clean_filename(title))
+    manifest = [
+        '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>',
+        '<item id="style_css" href="style.css" media-type="text/css"/>',
+    ]
+    spine = []
+    nav_points = []
+    cover_meta = ""
+
+    with zipfile.ZipFile(
+        zip_path, "w", zipfile.ZIP_DEFLATED, compresslevel=EPUB_COMPRESS_LEVEL
+    ) as zf:
+        # The mimetype entry must come first and be stored uncompressed
+        zf.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        zf.writestr("META-INF/container.xml", CONTAINER_XML)
+        zf.writestr("EPUB/style.css", CSS_STYLE)
+
+        if cover_bytes:
+            zf.writestr("EPUB/cover.jpg", cover_bytes)
+            manifest.append('<item id="cover-img" href="cover.jpg" media-type="image/jpeg"/>')
+            cover_meta = '<meta name="cover" content="cover-img"/>'
+
+        writestr = zf.writestr
+        render_chapter = CHAPTER_XHTML.format
+        add_manifest = manifest.append
+        add_spine = spine.append
+        add_nav_point = nav_points.append
+        for idx, ch in enumerate(chapters, start=1):
+            content = await load_content(ch["url"])
+            if content is None:
+                raise ValueError(f"Chapter missing from cache: {ch['title']}")
+
+            ch_title = escape(ch["title"])
+            file_name = f"chapter_{idx}.xhtml"
+            writestr(f"EPUB/{file_name}", render_chapter(title=ch_title, content=content))
+
+            add_manifest(
+                f'<item id="chapter_{idx}" href="{file_name}" media-type="application/xhtml+xml"/>'
+            )
+            add_spine(f'<itemref idref="chapter_{idx}"/>')
+            add_nav_point(
+                f'<navPoint id="chapter_{idx}" playOrder="{idx}">'
+                f"<navLabel><text>{ch_title}</text></navLabel>"
+                f'<content src="{file_name}"/></navPoint>'
+            )
+
+        newline = "\n    "
+        zf.writestr(
+            "EPUB/content.opf",
+            f"""<?xml version="1.0" encoding="utf-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0" unique-identifier="id">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:opf="http://www.idpf.org/2007/opf">
+    <dc:identifier id="id">{identifier}</dc:identifier>
+    <dc:title>{escape(title)}</dc:title>
+    <dc:language>en</dc:language>
+    <dc:creator opf:role="aut">{escape(author)}</dc:creator>
+    <dc:description>{escape(description)}</dc:description>
+    {cover_meta}
+  </metadata>
+  <manifest>
+    {newline.join(manifest)}
+  </manifest>
+  <spine toc="ncx">
+    {newline.join(spine)}
+  </spine>
+</package>
+""",
+        )
+        zf.writestr(
+            "EPUB/toc.ncx",
+            f"""<?xml version="1.0" encoding="utf-8"?>
+<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">
+  <head>
+    <meta name="dtb:uid" content="{identifier}"/>
+    <meta name="dtb:depth" content="1"/>
+    <meta name="dtb:totalPageCount" content="0"/>
+    <meta name="dtb:maxPageNumber" content="0"/>
+  </head>
+  <docTitle><text>{escape(title)}</text></docTitle>
+  <navMap>
+    {newline.join(nav_points)}
+  </navMap>
+</ncx>
+""",
+        )
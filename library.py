@@ -1,7 +1,6 @@
 # library.py
-import json
-import aiofiles
-from pathlib import Path
+import os
+import orjson
 from .config import LIBRARY_FILE
 
 
@@ -9,30 +8,29 @@ class LibraryManager:
     def __init__(self):
         self.file = LIBRARY_FILE
         self.library = {}
+        self.load()
 
     def load(self):
         """Loads the library from the JSON file."""
         if self.file.exists():
             try:
-                with open(self.file, "r", encoding="utf-8") as f:
-                    self.library = json.load(f)
-            except json.JSONDecodeError:
+                self.library = orjson.loads(self.file.read_bytes())
+            except orjson.JSONDecodeError:
                 self.library = {}
         else:
             self.library = {}
 
     def save(self):
-        """Saves current library to JSON."""
-        with open(self.file, "w", encoding="utf-8") as f:
-            json.dump(self.library, f, indent=4, ensure_ascii=False)
+        """Saves current library to JSON (atomically, via a temp file)."""
+        tmp_file = self.file.with_suffix(".json.tmp")
+        tmp_file.write_bytes(orjson.dumps(self.library, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_file, self.file)
 
     def add_novel(self, title, url, total_chapters):
         """Adds or updates a novel in the library."""
-        self.load()
         self.library[url] = {"title": title, "url": url, "last_count": total_chapters}
         self.save()
         print(f"✅ Added/Updated '{title}' in your library.")
 
     def get_all(self):
-        self.load()
         return self.library
@@ -0,0 +1,52 @@
+# limiter.py
+import asyncio
+from collections import deque
+
+from .config import ADJUST_WINDOW, ADJUST_OVERLOAD_RATE
+
+
+class ServiceOverloadError(Exception):
+    """Raised when the server answers with HTTP 429 (Too Many Requests)."""
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter, in the spirit of TCP congestion control.
+    Halves the allowed in-flight requests when too many responses in the
+    last window were 429s, and adds one back after every clean window.
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+        self._outcomes = deque(maxlen=ADJUST_WINDOW)
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def record(self, overloaded: bool):
+        """Feeds one response outcome into the controller."""
+        self._outcomes.append(overloaded)
+        if len(self._outcomes) < ADJUST_WINDOW:
+            return
+
+        overload_rate = sum(self._outcomes) / len(self._outcomes)
+        if overload_rate > ADJUST_OVERLOAD_RATE:
+            # Multiplicative decrease
+            self.limit = max(self.minimum, self.limit // 2)
+            self._outcomes.clear()
+        elif not any(self._outcomes):
+            # Additive increase
+            self.limit = min(self.maximum, self.limit + 1)
+            self._outcomes.clear()
@@ -1,11 +1,10 @@
 import asyncio
 import argparse
+import sys
+import time
 from pathlib import Path
 
-# NEW: The Bypass Library
-from curl_cffi.requests import AsyncSession
-
-from .config import DEFAULT_OUTPUT_DIR
+from .config import DEFAULT_OUTPUT_DIR, PROGRESS_INTERVAL
 from .scraper import AsyncScraper
 from .epub_builder import create_epub
 from .library import LibraryManager
@@ -14,7 +13,6 @@ from .utils import parse_chapter_selection
 
 async def download_workflow(
     scraper,
-    session,
     title,
     author,
     cover,
@@ -39,23 +37,32 @@ async def download_workflow(
 
     total = len(selected_chapters)
     completed_count = 0
+    fetch = scraper.fetch_chapter_content
+    last_update_ts = 0.0
 
     async def fetch_with_progress(ch):
-        nonlocal completed_count
-        # Pass the session to the scraper
-        content = await scraper.fetch_chapter_content(session, ch)
+        nonlocal completed_count, last_update_ts
+        content = await fetch(ch)
         completed_count += 1
 
-        print(f"\rProgress: {completed_count}/{total} processed", end="", flush=True)
+        # Throttle terminal writes to ~20/s; they block the event loop on slow ttys
+        now = time.monotonic()
+        if now - last_update_ts > PROGRESS_INTERVAL or completed_count == total:
+            last_update_ts = now
+            sys.stdout.write(f"\rProgress: {completed_count}/{total} processed")
+            sys.stdout.flush()
 
         if content is None:
             return None
 
-        return {"title": ch["name"], "content": content}
+        # Content stays in the cache; the EPUB builder reads it back lazily
+        return {"title": ch["name"], "url": ch["url"]}
 
     # 2. Run All Downloads (Parallel & Non-Blocking)
+    await scraper.warm_up()
     tasks = [fetch_with_progress(ch) for ch in selected_chapters]
     results = await asyncio.gather(*tasks)
+    await scraper.flush_cache()
     print()  # New line after progress bar
 
     # 3. Separate Successes from Failures
@@ -85,12 +92,22 @@ async def download_workflow(
     out_dir.mkdir(parents=True, exist_ok=True)
 
     try:
-        create_epub(title, author, cover, description, downloaded_data, out_dir)
+        cover_bytes = await scraper.fetch_cover(cover) if cover else None
+        await create_epub(
+            title,
+            author,
+            cover_bytes,
+            description,
+            downloaded_data,
+            out_dir,
+            scraper.get_cached_chapter,
+        )
 
         # Auto-Cleanup
         print("🧹 Cleaning up cache...", end=" ")
         for ch in selected_chapters:
-            scraper.clear_cache_for_url(ch["url"])
+            await scraper.clear_cache_for_url(ch["url"])
+        await scraper.flush_cache()
         print("Done!")
 
     except Exception as e:
@@ -106,56 +123,62 @@ async def check_updates(scraper, lib_manager):
 
     print(f"\n🔄 Checking updates for {len(favorites)} novels...")
 
-    # NEW: Initialize AsyncSession with Chrome impersonation
-    async with AsyncSession(impersonate="chrome") as session:
-        updates_found = False
+    # Scrape all metadata concurrently (the limiter keeps it polite), then
+    # prompt once the network work is done
+    urls = list(favorites)
+    metas = await asyncio.gather(
+        *[scraper.extract_metadata(url) for url in urls], return_exceptions=True
+    )
+
+    updates_found = False
 
-        for url, data in favorites.items():
-            print(f"Checking: {data['title']}...", end=" ", flush=True)
-            try:
-                # We scrape metadata to get current chapter count
-                title, author, cover, description, current_chapters = (
-                    await scraper.extract_metadata(session, url)
+    for url, meta in zip(urls, metas):
+        data = favorites[url]
+        print(f"Checking: {data['title']}...", end=" ", flush=True)
+        if isinstance(meta, Exception):
+            print(f"Error: {meta}")
+            continue
+
+        try:
+            title, author, cover, description, current_chapters = meta
+            current_count = len(current_chapters)
+            last_count = data.get("last_count", 0)
+
+            if current_count > last_count:
+                new_chapters_count = current_count - last_count
+                print(f"✨ FOUND {new_chapters_count} NEW CHAPTERS!")
+                updates_found = True
+
+                choice = (
+                    input(
+                        f"   Download new chapters ({last_count+1}-{current_count})? [Y/n]: "
+                    )
+                    .strip()
+                    .lower()
                 )
-                current_count = len(current_chapters)
-                last_count = data.get("last_count", 0)
-
-                if current_count > last_count:
-                    new_chapters_count = current_count - last_count
-                    print(f"✨ FOUND {new_chapters_count} NEW CHAPTERS!")
-                    updates_found = True
-
-                    choice = (
-                        input(
-                            f"   Download new chapters ({last_count+1}-{current_count})? [Y/n]: "
-                        )
-                        .strip()
-                        .lower()
+                if choice in ["", "y"]:
+                    new_indices = list(range(last_count, current_count))
+
+                    await download_workflow(
+                        scraper,
+                        title,
+                        author,
+                        cover,
+                        description,
+                        current_chapters,
+                        new_indices,
                     )
-                    if choice in ["", "y"]:
-                        new_indices = list(range(last_count, current_count))
-
-                        await download_workflow(
-                            scraper,
-                            session,
-                            title,
-                            author,
-                            cover,
-                            description,
-                            current_chapters,
-                            new_indices,
-                        )
 
-                        # Update library count
-                        lib_manager.add_novel(title, url, current_count)
-                else:
-                    print("Up to date.")
+                    # Update library count
+                    lib_manager.add_novel(title, url, current_count)
+            else:
+                print("Up to date.")
 
-            except Exception as e:
-                print(f"Error: {e}")
+        except Exception as e:
+            print(f"Error: {e}")
 
-        if not updates_found:
-            print("\n✅ All your novels are up to date.")
+    if not updates_found:
+        print("\n✅ All your novels are up to date.")
 
 
 async def main():
@@ -163,31 +186,32 @@ async def main():
     parser.add_argument("-q", "--query", help="Quick search")
     args = parser.parse_args()
 
-    scraper = AsyncScraper()
     lib = LibraryManager()
 
-    # If query provided via CLI, skip menu
-    if args.query:
-        await search_mode(scraper, lib, args.query)
-        return
-
-    while True:
-        print("\n=== 📚 NOVEL MANAGER ===")
-        print("1. 🔍 Search & Download")
-        print("2. 🔄 Check for Updates (Library)")
-        print("3. ❌ Exit")
-
-        choice = input("Select option: ").strip()
-
-        if choice == "1":
-            await search_mode(scraper, lib)
-        elif choice == "2":
-            await check_updates(scraper, lib)
-        elif choice == "3":
-            print("Bye!")
-            break
-        else:
-            print("Invalid option")
+    # A single scraper (and HTTP session) is shared by every action in this run
+    async with AsyncScraper() as scraper:
+        # If query provided via CLI, skip menu
+        if args.query:
+            await search_mode(scraper, lib, args.query)
+            return
+
+        while True:
+            print("\n=== 📚 NOVEL MANAGER ===")
+            print("1. 🔍 Search & Download")
+            print("2. 🔄 Check for Updates (Library)")
+            print("3. ❌ Exit")
+
+            choice = input("Select option: ").strip()
+
+            if choice == "1":
+                await search_mode(scraper, lib)
+            elif choice == "2":
+                await check_updates(scraper, lib)
+            elif choice == "3":
+                print("Bye!")
+                break
+            else:
+                print("Invalid option")
 
 
 async def search_mode(scraper, lib, query=None):
@@ -195,7 +219,6 @@ async def search_mode(scraper, lib, query=None):
         query = input("\n🔍 Enter novel name: ").strip()
 
     print("Searching...")
-    # Scraper handles session internally for search
     results = await scraper.search_novel(query)
 
     if not results:
@@ -215,27 +238,25 @@ async def search_mode(scraper, lib, query=None):
         except ValueError:
             pass
 
-    # NEW: Initialize AsyncSession with Chrome impersonation
-    async with AsyncSession(impersonate="chrome") as session:
-        title, author, cover, description, all_chapters = (
-            await scraper.extract_metadata(session, novel["url"])
-        )
-        print(f"📖 {title} by {author} ({len(all_chapters)} chapters)")
-
-        # Ask to Add to Library
-        if novel["url"] not in lib.get_all():
-            while True:
-                fav = input("⭐ Add to Library for tracking? [y/N]: ").strip().lower()
-                if fav in ("y", "n"):
-                    break
-            
-            if fav == "y":
-                lib.add_novel(title, novel["url"], len(all_chapters))
-
-        # Proceed to Download
-        await download_workflow(
-            scraper, session, title, author, cover, description, all_chapters
-        )
+    title, author, cover, description, all_chapters = (
+        await scraper.extract_metadata(novel["url"])
+    )
+    print(f"📖 {title} by {author} ({len(all_chapters)} chapters)")
+
+    # Ask to Add to Library
+    if novel["url"] not in lib.get_all():
+        while True:
+            fav = input("⭐ Add to Library for tracking? [y/N]: ").strip().lower()
+            if fav in ("y", "n"):
+                break
+
+        if fav == "y":
+            lib.add_novel(title, novel["url"], len(all_chapters))
+
+    # Proceed to Download
+    await download_workflow(
+        scraper, title, author, cover, description, all_chapters
+    )
 
 
 def start():
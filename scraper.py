@@ -1,56 +1,197 @@
 import asyncio
+import functools
 import hashlib
-import aiofiles
-from pathlib import Path
-from bs4 import BeautifulSoup
+import html as html_lib
+import json
+import re
+import threading
+import time
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+from lxml.html import HtmlElement
 from typing import List, Dict, Optional, Tuple
 
 # NEW: The Bypass Library
-from curl_cffi.requests import AsyncSession, RequestsError
+from curl_cffi import CurlHttpVersion
+from curl_cffi.requests import AsyncSession, RequestsError, Response
 
 from .config import (
     BASE_URL,
     HEADERS,
     MAX_CONCURRENT_REQUESTS,
+    INITIAL_CONCURRENT_REQUESTS,
     REQUEST_TIMEOUT,
     MAX_RETRIES,
     RETRY_DELAY,
+    META_CACHE_TTL,
     CACHE_DIR,
 )
+from .cache import CacheStore
+from .limiter import AdaptiveLimiter, ServiceOverloadError
+
+_blake2b = hashlib.blake2b
+
+# Chapter links in the AJAX archive: <ul class="list-chapter"> blocks holding
+# <a href="..." title="Chapter name"> tags (attributes in any order)
+_CHAPTER_LIST_RE = re.compile(
+    r'<ul\b[^>]*\bclass="[^"]*\blist-chapter\b[^"]*"[^>]*>(.*?)</ul>', re.I | re.S
+)
+_ANCHOR_TAG_RE = re.compile(r"<a\b[^>]*>", re.I)
+# The lookbehind keeps data-href= / data-title= from matching
+_ANCHOR_ATTR_RE = re.compile(
+    r"""(?<![\w-])(href|title)\s*=\s*(?:"([^"]*)"|'([^']*)')""", re.I
+)
+
+_CHAPTER_CONTENT_SELECTOR = CSSSelector("#chr-content, .chr-c, .chapter-content, article")
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Junk inside the chapter body, found in a single descendant traversal
+_CHAPTER_JUNK_XPATH = etree.XPath(
+    ".//*[self::div or self::script or self::style or self::h3 or self::h4"
+    " or self::footer or self::nav or self::aside or self::iframe"
+    f" or {_has_class('ads')} or {_has_class('chapter-title')}]"
+)
+
+
+# lxml locks a parser object for the whole parse, so each to_thread worker
+# gets its own instead of serializing on a shared one
+_parser_local = threading.local()
+
+
+def _html_parser() -> lxml.html.HTMLParser:
+    parser = getattr(_parser_local, "parser", None)
+    if parser is None:
+        # Text is re-encoded as UTF-8 and parsed with an explicit encoding, so
+        # pages carrying an <?xml ... encoding=...?> declaration still parse
+        parser = _parser_local.parser = lxml.html.HTMLParser(encoding="utf-8")
+    return parser
+
+
+def _parse_html(html: str) -> Optional[HtmlElement]:
+    """Parses a page, returning None for empty or unparseable documents."""
+    try:
+        return lxml.html.fromstring(html.encode("utf-8"), parser=_html_parser())
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def _select_one(tree: HtmlElement, selector: str) -> Optional[HtmlElement]:
+    """First match of a CSS selector, like BeautifulSoup's select_one."""
+    matches = tree.cssselect(selector)
+    return matches[0] if matches else None
+
+
+# Elements that start a new paragraph; anything else is inline text
+_BLOCK_TAGS = {"p", "div", "section", "blockquote", "li", "ul", "ol"}
+
+
+def _flush_paragraph(paragraphs: List[str], current: List[str]):
+    text = " ".join("".join(current).split())
+    if text:
+        paragraphs.append(text)
+    current.clear()
+
+
+def _collect_paragraphs(el: HtmlElement, paragraphs: List[str], current: List[str]):
+    """Walks `el`, breaking paragraphs only at <br> and block elements."""
+    if el.text:
+        current.append(el.text)
+    for child in el:
+        if not isinstance(child.tag, str):
+            pass  # Comments / processing instructions: keep only the tail
+        elif child.tag == "br":
+            _flush_paragraph(paragraphs, current)
+        elif child.tag in _BLOCK_TAGS:
+            _flush_paragraph(paragraphs, current)
+            _collect_paragraphs(child, paragraphs, current)
+            _flush_paragraph(paragraphs, current)
+        else:
+            _collect_paragraphs(child, paragraphs, current)
+        if child.tail:
+            current.append(child.tail)
+
+
+def _paragraphs_html(tag: HtmlElement) -> str:
+    """
+    Rebuilds a tag's story text as plain <p> elements, one per paragraph,
+    instead of serializing the DOM fragment. Handles both <p> markup and
+    bare text separated by <br>, including a mix of the two.
+    """
+    paragraphs: List[str] = []
+    current: List[str] = []
+    _collect_paragraphs(tag, paragraphs, current)
+    _flush_paragraph(paragraphs, current)
+    return "\n".join(f"<p>{html_lib.escape(text)}</p>" for text in paragraphs)
 
 
 class AsyncScraper:
     def __init__(self):
-        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.limiter = AdaptiveLimiter(
+            INITIAL_CONCURRENT_REQUESTS, MAX_CONCURRENT_REQUESTS
+        )
+        self.session: Optional[AsyncSession] = None
         CACHE_DIR.mkdir(exist_ok=True)
-
-    def clear_cache_for_url(self, url: str):
-        """Deletes the cached file for a single URL to free up space."""
-        cache_path = Path(self._get_cache_path(url))
-        if cache_path.exists():
-            cache_path.unlink()
-
-    async def _fetch_url(
-        self, session: AsyncSession, url: str
-    ) -> Optional[str]:
+        self.cache = CacheStore()
+
+    async def __aenter__(self):
+        await self.cache.open()
+        # One session for the whole run so TLS sessions and keep-alive
+        # connections are reused across every request. HTTP/2 lets the
+        # concurrent chapter fetches share a multiplexed connection.
+        self.session = await AsyncSession(
+            impersonate="chrome",
+            http_version=CurlHttpVersion.V2_0,
+            max_clients=MAX_CONCURRENT_REQUESTS,
+        ).__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.session is not None:
+            await self.session.__aexit__(exc_type, exc, tb)
+            self.session = None
+        await self.cache.close()
+
+    async def clear_cache_for_url(self, url: str):
+        """Deletes the cached entry for a single URL to free up space."""
+        await self.cache.delete(self._get_cache_key(url))
+
+    async def get_cached_chapter(self, url: str) -> Optional[str]:
+        """Reads a previously downloaded chapter fragment from the cache."""
+        return await self.cache.get(self._get_cache_key(url))
+
+    async def flush_cache(self):
+        """Commits buffered cache writes, e.g. once a batch of downloads is done."""
+        await self.cache.flush()
+
+    async def _fetch_response(
+        self, url: str, extra_headers: Optional[Dict] = None
+    ) -> Optional[Response]:
         """Fetches URL with retry logic and timeout using curl_cffi."""
+        headers = {**HEADERS, **extra_headers} if extra_headers else HEADERS
         for attempt in range(MAX_RETRIES):
             try:
-                async with self.semaphore:
+                async with self.limiter:
                     # curl_cffi: No context manager needed for the request object itself
-                    response = await session.get(
-                        url, headers=HEADERS, timeout=REQUEST_TIMEOUT
+                    response = await self.session.get(
+                        url, headers=headers, timeout=REQUEST_TIMEOUT
                     )
-                    
+
                     if response.status_code == 429:  # Rate limit
-                        await asyncio.sleep(RETRY_DELAY * (attempt + 1))
-                        continue
-                        
+                        self.limiter.record(overloaded=True)
+                        raise ServiceOverloadError(url)
+                    self.limiter.record(overloaded=False)
+
                     response.raise_for_status()
-                    
-                    # Note: .text is a property in curl_cffi, not an awaitable method
-                    return response.text
+                    return response
 
+            except ServiceOverloadError:
+                # Back off outside the limiter so the slot is released
+                await asyncio.sleep(RETRY_DELAY * (attempt + 1))
             except (RequestsError, asyncio.TimeoutError) as e:
                 print(
                     f"⚠️ Network error ({url}): {e}. Retrying {attempt + 1}/{MAX_RETRIES}..."
@@ -63,148 +204,307 @@ class AsyncScraper:
         print(f"❌ Failed to fetch {url} after {MAX_RETRIES} attempts.")
         return None
 
-    def _get_cache_path(self, url: str) -> str:
-        url_hash = hashlib.md5(url.encode()).hexdigest()
-        return str(CACHE_DIR / f"{url_hash}.html")
+    async def _fetch_url(self, url: str) -> Optional[str]:
+        response = await self._fetch_response(url)
+        # Note: .text is a property in curl_cffi, not an awaitable method
+        return response.text if response is not None else None
+
+    async def warm_up(self):
+        """
+        Opens one connection to the site ahead of a burst of requests, so the
+        concurrent fetches multiplex over it instead of racing to handshake.
+        """
+        try:
+            await self.session.head(BASE_URL, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+        except (RequestsError, asyncio.TimeoutError):
+            pass  # Best effort; the real requests retry on their own
+
+    async def fetch_cover(self, cover_url: str) -> Optional[bytes]:
+        """Downloads the cover image through the shared session."""
+        print("🖼️ Downloading cover...")
+        response = await self._fetch_response(cover_url)
+        if response is None:
+            print("⚠️ Could not download cover")
+            return None
+        return response.content
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)
+    def _get_cache_key(url: str) -> str:
+        # Each chapter URL is hashed on fetch and again on cleanup.
+        # Non-cryptographic use: blake2b is faster than md5 in CPython.
+        return _blake2b(url.encode(), digest_size=16).hexdigest()
+
+    def _get_meta_cache_key(self, url: str) -> str:
+        return f"meta_{self._get_cache_key(url)}"
+
+    async def _load_cached_metadata(self, url: str) -> Optional[Dict]:
+        body = await self.cache.get(self._get_meta_cache_key(url))
+        if body is None:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
+
+    async def _save_cached_metadata(self, url: str, meta: Dict):
+        meta["fetched_at"] = time.time()
+        await self.cache.put(
+            self._get_meta_cache_key(url), json.dumps(meta, ensure_ascii=False)
+        )
+        await self.cache.flush()
 
-    async def get_cached_or_fetch(
-        self, session: AsyncSession, url: str
-    ) -> str:
-        cache_path = self._get_cache_path(url)
-        path_obj = Path(cache_path)
+    async def get_cached_or_fetch(self, url: str) -> str:
+        cache_key = self._get_cache_key(url)
 
-        if path_obj.exists():
-            async with aiofiles.open(cache_path, "r", encoding="utf-8") as f:
-                return await f.read()
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-        content = await self._fetch_url(session, url)
+        content = await self._fetch_url(url)
         if content:
-            async with aiofiles.open(cache_path, "w", encoding="utf-8") as f:
-                await f.write(content)
+            await self.cache.put(cache_key, content)
             return content
         return ""
 
-    def clean_soup(self, html: str) -> BeautifulSoup:
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup(
-            ["script", "style", "footer", "nav", "aside", "iframe", "div.ads"]
-        ):
-            tag.decompose()
-        return soup
+    def clean_tree(self, html: str) -> Optional[HtmlElement]:
+        tree = _parse_html(html)
+        if tree is None:
+            return None
+        for tag in tree.cssselect("script, style, footer, nav, aside, iframe, div.ads"):
+            tag.drop_tree()
+        return tree
 
     async def search_novel(self, query: str) -> List[Dict]:
-        # Create a local session just for search since it's a standalone action
-        async with AsyncSession(impersonate="chrome") as session:
-            url = f"{BASE_URL}/search?keyword={query.replace(' ', '+')}"
-            html = await self._fetch_url(session, url)
-            if not html:
-                return []
-
-            soup = self.clean_soup(html)
-            results = []
-
-            for item in soup.select(".list-novel .row, .novel-item"):
-                title_tag = item.select_one("h3 a, .novel-title a")
-                if title_tag:
-                    href = title_tag.get("href")
-                    if href and not href.startswith("http"):
-                        href = BASE_URL + href
-                    results.append({"title": title_tag.text.strip(), "url": href})
-            return results
-
-    async def extract_metadata(self, session: AsyncSession, url: str) -> Tuple:
-        html = await self._fetch_url(session, url)
+        url = f"{BASE_URL}/search?keyword={query.replace(' ', '+')}"
+        html = await self._fetch_url(url)
         if not html:
+            return []
+        return await asyncio.to_thread(self._parse_search_results, html)
+
+    def _parse_search_results(self, html: str) -> List[Dict]:
+        tree = self.clean_tree(html)
+        if tree is None:
+            return []
+        results = []
+
+        for item in tree.cssselect(".list-novel .row, .novel-item"):
+            title_tag = _select_one(item, "h3 a, .novel-title a")
+            if title_tag is not None:
+                href = title_tag.get("href")
+                if href and not href.startswith("http"):
+                    href = BASE_URL + href
+                results.append({"title": title_tag.text_content().strip(), "url": href})
+        return results
+
+    async def extract_metadata(self, url: str) -> Tuple:
+        """
+        Returns (title, author, cover_url, description, chapters). The parsed
+        result is cached and revalidated with ETag / Last-Modified, so an
+        unchanged novel page is never re-parsed. Those validators only cover
+        the novel page, so the AJAX chapter archive is always re-fetched.
+        """
+        cached = await self._load_cached_metadata(url)
+        conditional_headers = {}
+        if cached:
+            if time.time() - cached.get("fetched_at", 0) < META_CACHE_TTL:
+                return self._unpack_metadata(cached)
+            if cached.get("etag"):
+                conditional_headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                conditional_headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = await self._fetch_response(url, conditional_headers)
+        if response is None:
             raise ValueError("Could not fetch novel page")
 
-        soup = self.clean_soup(html)
+        if response.status_code == 304 and cached:
+            if cached.get("novel_id"):
+                chapters = await self._fetch_chapter_archive(cached["novel_id"])
+                if not chapters:
+                    # Archive unavailable: serve the last good list, but do not
+                    # refresh the TTL so the next call tries again
+                    return self._unpack_metadata(cached)
+                cached["chapters"] = chapters
+            await self._save_cached_metadata(url, cached)
+            return self._unpack_metadata(cached)
+
+        html = response.text
+        if not html:
+            raise ValueError("Could not fetch novel page")
 
-        title_tag = soup.select_one("h1, .novel-title")
-        title = title_tag.text.strip() if title_tag else "Untitled"
+        # Parsing runs off the event loop so concurrent downloads keep going
+        meta = await asyncio.to_thread(self._parse_novel_page, html)
+        novel_id = meta["novel_id"]
+        page_chapters = meta.pop("page_chapters")
+
+        if novel_id:
+            chapters = await self._fetch_chapter_archive(novel_id)
+            if not chapters:
+                # The page only lists a few recent chapters; never cache that
+                # stand-in as if it were the full archive
+                meta["chapters"] = page_chapters
+                return self._unpack_metadata(meta)
+            meta["chapters"] = chapters
+        else:
+            meta["chapters"] = page_chapters
+
+        meta["etag"] = response.headers.get("ETag")
+        meta["last_modified"] = response.headers.get("Last-Modified")
+
+        await self._save_cached_metadata(url, meta)
+        return self._unpack_metadata(meta)
+
+    async def _fetch_chapter_archive(self, novel_id: str) -> List[Dict]:
+        """Fetches and parses the AJAX chapter archive ([] on failure)."""
+        ajax_url = f"{BASE_URL}/ajax/chapter-archive?novelId={novel_id}"
+        ajax_html = await self._fetch_url(ajax_url)
+        if not ajax_html:
+            return []
+        return await asyncio.to_thread(self._parse_chapter_archive, ajax_html)
+
+    def _parse_novel_page(self, html: str) -> Dict:
+        tree = self.clean_tree(html)
+        if tree is None:
+            raise ValueError("Could not parse novel page")
+
+        title_tag = _select_one(tree, "h1, .novel-title")
+        title = title_tag.text_content().strip() if title_tag is not None else "Untitled"
 
         author = "Unknown"
-        for li in soup.select("ul.info li"):
-            if "Author" in li.text:
+        for li in tree.cssselect("ul.info li"):
+            li_text = li.text_content()
+            if "Author" in li_text:
                 author = (
-                    li.get_text(strip=True)
+                    li_text.strip()
                     .replace("Author", "")
                     .replace(":", "")
                     .strip()
                 )
                 break
 
-        cover_tag = soup.select_one(".book img, .cover img")
+        cover_tag = _select_one(tree, ".book img, .cover img")
         cover_url = (
-            cover_tag.get("src") or cover_tag.get("data-src") if cover_tag else None
+            cover_tag.get("src") or cover_tag.get("data-src")
+            if cover_tag is not None
+            else None
         )
-        desc_div = soup.select_one(".desc-text")
+        desc_div = _select_one(tree, ".desc-text")
         description = ""
-        if desc_div:
-            paragraphs = [p.get_text(strip=True) for p in desc_div.find_all("p")]
+        if desc_div is not None:
+            paragraphs = [p.text_content().strip() for p in desc_div.iter("p")]
             description = "\n".join(paragraphs)
 
+        novel_id_tag = _select_one(tree, "#rating[data-novel-id]")
+        novel_id = novel_id_tag.get("data-novel-id") if novel_id_tag is not None else None
+
+        # Fallback when the AJAX archive is unavailable
+        page_chapters = []
+        for a in tree.cssselect(".list-chapter li a, .chapter-list li a"):
+            href = a.get("href")
+            if href and not href.startswith("http"):
+                href = BASE_URL + href
+            page_chapters.append({"name": a.text_content().strip(), "url": href})
+
+        return {
+            "title": title,
+            "author": author,
+            "cover_url": cover_url,
+            "description": description,
+            "novel_id": novel_id,
+            "page_chapters": page_chapters,
+        }
+
+    def _parse_chapter_archive(self, ajax_html: str) -> List[Dict]:
+        # The archive is a flat list of links, a regex scan beats building a DOM
+        chapters = self._scan_chapter_archive(ajax_html)
+        if chapters:
+            return chapters
+
+        # Markup changed (e.g. no title attribute): fall back to a real parse
         chapters = []
-        novel_id_tag = soup.select_one("#rating[data-novel-id]")
-
-        if novel_id_tag:
-            novel_id = novel_id_tag["data-novel-id"]
-            ajax_url = f"{BASE_URL}/ajax/chapter-archive?novelId={novel_id}"
-            ajax_html = await self._fetch_url(session, ajax_url)
-
-            if ajax_html:
-                ajax_soup = BeautifulSoup(ajax_html, "html.parser")
-                for li in ajax_soup.select("ul.list-chapter li a"):
-                    href = li.get("href")
-                    if href and not href.startswith("http"):
-                        href = BASE_URL + href
-                    chapters.append({"name": li.text.strip(), "url": href})
-
-        if not chapters:
-            for a in soup.select(".list-chapter li a, .chapter-list li a"):
-                href = a.get("href")
-                if href and not href.startswith("http"):
+        ajax_tree = _parse_html(ajax_html)
+        if ajax_tree is None:
+            return chapters
+        for li in ajax_tree.cssselect("ul.list-chapter li a"):
+            href = li.get("href")
+            if href and not href.startswith("http"):
+                href = BASE_URL + href
+            chapters.append({"name": li.text_content().strip(), "url": href})
+        return chapters
+
+    def _scan_chapter_archive(self, ajax_html: str) -> List[Dict]:
+        """
+        Regex fast path. Returns [] (so the DOM parse runs) unless every link
+        in the chapter lists has both an href and a title, since a silently
+        skipped link would shift every chapter index.
+        """
+        chapters = []
+        for block in _CHAPTER_LIST_RE.finditer(ajax_html):
+            for tag in _ANCHOR_TAG_RE.finditer(block.group(1)):
+                attrs = {
+                    m.group(1).lower(): m.group(2) if m.group(2) is not None else m.group(3)
+                    for m in _ANCHOR_ATTR_RE.finditer(tag.group(0))
+                }
+                if not attrs.get("href") or "title" not in attrs:
+                    return []
+                href = html_lib.unescape(attrs["href"])
+                if not href.startswith("http"):
                     href = BASE_URL + href
-                chapters.append({"name": a.text.strip(), "url": href})
-
-        return title, author, cover_url, description, chapters
+                chapters.append(
+                    {"name": html_lib.unescape(attrs["title"]).strip(), "url": href}
+                )
+        return chapters
+
+    @staticmethod
+    def _unpack_metadata(meta: Dict) -> Tuple:
+        return (
+            meta["title"],
+            meta["author"],
+            meta["cover_url"],
+            meta["description"],
+            meta["chapters"],
+        )
 
-    async def fetch_chapter_content(
-        self, session: AsyncSession, chapter: Dict
-    ) -> Optional[str]:
+    async def fetch_chapter_content(self, chapter: Dict) -> Optional[str]:
         """
         Checks cache. If missing, downloads, EXTRACTS only the story text,
         and saves that small fragment to cache.
         """
-        cache_path = Path(self._get_cache_path(chapter["url"]))
+        cache_key = self._get_cache_key(chapter["url"])
 
         # 1. Check Cache (Fast Path)
-        if cache_path.exists():
-            async with aiofiles.open(cache_path, "r", encoding="utf-8") as f:
-                return await f.read()
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
 
         # 2. Network Request (Slow Path)
-        html = await self._fetch_url(session, chapter["url"])
+        html = await self._fetch_url(chapter["url"])
         if not html:
             return None  # Explicit failure signal
 
-        # 3. Parse & Extract IMMEDIATELY
-        soup = self.clean_soup(html)
-        content_tag = soup.select_one("#chr-content, .chr-c, .chapter-content, article")
-
-        if content_tag:
-            # Clean junk tags
-            for bad in content_tag.select(
-                "div, script, style, .ads, .chapter-title, h3, h4"
-            ):
-                bad.decompose()
-
-            # Keep only the text, not full HTML
-            clean_content = content_tag.decode_contents()
-
-            # 4. Save Optimized Content to Cache
-            async with aiofiles.open(cache_path, "w", encoding="utf-8") as f:
-                await f.write(clean_content)
-
-            return clean_content
-
-        return None  # Content selector failed
+        # 3. Parse & Extract IMMEDIATELY (in a worker thread)
+        clean_content = await asyncio.to_thread(self._extract_chapter_text, html)
+        if clean_content is None:
+            return None  # Content selector failed
+
+        # 4. Save Optimized Content to Cache
+        await self.cache.put(cache_key, clean_content)
+        return clean_content
+
+    def _extract_chapter_text(self, html: str) -> Optional[str]:
+        # Only the chapter body matters, so skip the page-wide clean_tree pass
+        tree = _parse_html(html)
+        if tree is None:
+            return None
+        matches = _CHAPTER_CONTENT_SELECTOR(tree)
+        if not matches:
+            return None
+        content_tag = matches[0]
+
+        # Clean junk tags
+        for bad in _CHAPTER_JUNK_XPATH(content_tag):
+            bad.drop_tree()
+
+        # Keep only the text, not full HTML
+        return _paragraphs_html(content_tag)
@@ -0,0 +1,42 @@
+# tests/test_epub_builder.py
+import asyncio
+import zipfile
+
+import pytest
+
+from ..epub_builder import _write_epub_direct
+
+
+def _chapters(count):
+    return [{"title": f"Chapter {i}", "url": str(i)} for i in range(count)]
+
+
+async def _load(url):
+    return f"<p>Body {url}</p>"
+
+
+def test_write_epub_direct_produces_complete_book(tmp_path):
+    out = tmp_path / "Book.epub"
+    asyncio.run(_write_epub_direct(out, "Book", "Author", None, "", _chapters(3), _load))
+
+    with zipfile.ZipFile(out) as zf:
+        names = zf.namelist()
+    assert names[0] == "mimetype"
+    assert "EPUB/content.opf" in names and "EPUB/toc.ncx" in names
+    assert not (tmp_path / "Book.epub.tmp").exists()
+
+
+def test_write_epub_direct_keeps_previous_book_on_failure(tmp_path):
+    out = tmp_path / "Book.epub"
+    out.write_bytes(b"previous good copy")
+
+    async def load_missing(url):
+        return None if url == "1" else await _load(url)
+
+    with pytest.raises(ValueError):
+        asyncio.run(
+            _write_epub_direct(out, "Book", "Author", None, "", _chapters(3), load_missing)
+        )
+
+    assert out.read_bytes() == b"previous good copy"
+    assert not (tmp_path / "Book.epub.tmp").exists()
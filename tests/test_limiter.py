@@ -0,0 +1,61 @@
+# tests/test_limiter.py
+import asyncio
+
+from ..config import ADJUST_WINDOW
+from ..limiter import AdaptiveLimiter
+
+
+def _feed(limiter, overloaded_count, total=ADJUST_WINDOW):
+    for i in range(total):
+        limiter.record(overloaded=i < overloaded_count)
+
+
+def test_halves_when_overload_rate_exceeded():
+    limiter = AdaptiveLimiter(initial=16, maximum=32)
+    _feed(limiter, overloaded_count=3)  # 3/20 > 0.1
+    assert limiter.limit == 8
+
+
+def test_tolerates_overload_at_threshold():
+    limiter = AdaptiveLimiter(initial=16, maximum=32)
+    _feed(limiter, overloaded_count=2)  # 2/20 == 0.1, not above it
+    assert limiter.limit == 16
+
+
+def test_adds_one_per_clean_window_up_to_maximum():
+    limiter = AdaptiveLimiter(initial=8, maximum=10)
+    _feed(limiter, overloaded_count=0)
+    assert limiter.limit == 9
+    _feed(limiter, overloaded_count=0, total=ADJUST_WINDOW - 1)
+    assert limiter.limit == 9  # Window not full yet
+    limiter.record(overloaded=False)
+    assert limiter.limit == 10
+    _feed(limiter, overloaded_count=0)
+    assert limiter.limit == 10
+
+
+def test_never_shrinks_below_minimum():
+    limiter = AdaptiveLimiter(initial=4, maximum=32, minimum=2)
+    for _ in range(5):
+        _feed(limiter, overloaded_count=ADJUST_WINDOW)
+    assert limiter.limit == 2
+
+
+def test_in_flight_requests_stay_within_limit():
+    async def run():
+        limiter = AdaptiveLimiter(initial=3, maximum=32)
+        in_flight = 0
+        peak = 0
+
+        async def worker():
+            nonlocal in_flight, peak
+            async with limiter:
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.001)
+                in_flight -= 1
+
+        await asyncio.gather(*[worker() for _ in range(20)])
+        return peak
+
+    assert asyncio.run(run()) == 3
@@ -0,0 +1,225 @@
+# tests/test_scraper.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import lxml.html
+from curl_cffi.requests import RequestsError
+
+from .. import scraper as scraper_module
+from ..cache import CacheStore
+from ..scraper import AsyncScraper, _html_parser, _paragraphs_html
+
+
+def test_extract_chapter_text_empty_body():
+    assert AsyncScraper()._extract_chapter_text("   ") is None
+
+
+def test_extract_chapter_text_xml_declaration():
+    html = (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<html><body><div id="chr-content"><p>Héllo</p></div></body></html>'
+    )
+    assert AsyncScraper()._extract_chapter_text(html) == "<p>Héllo</p>"
+
+
+def test_parse_search_results_empty_body():
+    assert AsyncScraper()._parse_search_results("\n") == []
+
+
+def test_parse_chapter_archive_empty_body():
+    assert AsyncScraper()._parse_chapter_archive("  ") == []
+
+
+def _paragraphs(fragment: str) -> str:
+    return _paragraphs_html(lxml.html.fragment_fromstring(fragment))
+
+
+def test_paragraphs_from_p_tags():
+    html = '<div><p>Hello <b>bold</b> &lt;world&gt;</p>\n<p>  Second   line </p></div>'
+    assert _paragraphs(html) == "<p>Hello bold &lt;world&gt;</p>\n<p>Second line</p>"
+
+
+def test_paragraphs_from_br_separated_text():
+    html = "<div>He said <i>no</i> loudly.<br>Next line<br/><br/>Last</div>"
+    assert _paragraphs(html) == (
+        "<p>He said no loudly.</p>\n<p>Next line</p>\n<p>Last</p>"
+    )
+
+
+def test_paragraphs_keep_bare_text_next_to_p():
+    html = "<div>Intro text<p>Inside</p>Trailing <em>text</em></div>"
+    assert _paragraphs(html) == (
+        "<p>Intro text</p>\n<p>Inside</p>\n<p>Trailing text</p>"
+    )
+
+
+def test_paragraphs_skip_comments():
+    html = "<div>One<!-- ad slot -->Two</div>"
+    assert _paragraphs(html) == "<p>OneTwo</p>"
+
+
+def test_parse_chapter_archive_attribute_order():
+    html = (
+        '<ul class="list-chapter">'
+        '<li><a href="/b/x/c-1" title="Chapter 1 &amp; more"><span>Chapter 1</span></a></li>'
+        "<li><a title='Chapter 2' class=\"c\" href='/b/x/c-2'>Chapter 2</a></li>"
+        "</ul>"
+    )
+    assert AsyncScraper()._parse_chapter_archive(html) == [
+        {"name": "Chapter 1 & more", "url": "https://novelbin.com/b/x/c-1"},
+        {"name": "Chapter 2", "url": "https://novelbin.com/b/x/c-2"},
+    ]
+
+
+def test_parse_chapter_archive_ignores_links_outside_list():
+    html = (
+        '<a href="/other" title="Not a chapter"></a>'
+        '<ul class="list-chapter"><li><a href="/c-1" title="C1">C1</a></li></ul>'
+    )
+    assert AsyncScraper()._parse_chapter_archive(html) == [
+        {"name": "C1", "url": "https://novelbin.com/c-1"},
+    ]
+
+
+def test_parse_chapter_archive_falls_back_without_titles():
+    html = (
+        '<ul class="list-chapter">'
+        '<li><a href="/c-1" title="C1">C1</a></li>'
+        '<li><a href="/c-2">C2</a></li>'
+        "</ul>"
+    )
+    assert AsyncScraper()._parse_chapter_archive(html) == [
+        {"name": "C1", "url": "https://novelbin.com/c-1"},
+        {"name": "C2", "url": "https://novelbin.com/c-2"},
+    ]
+
+
+def test_extract_chapter_text_drops_junk():
+    html = (
+        '<html><body><div id="chr-content">'
+        "<h3>Title</h3><p>Kept</p><div>ad block</div>"
+        "<aside><p>aside</p></aside><nav><p>nav</p></nav><footer><p>foot</p></footer>"
+        '<iframe src="x"></iframe><p class="x ads">promo</p><script>js()</script>'
+        "<p>Also kept</p></div></body></html>"
+    )
+    assert AsyncScraper()._extract_chapter_text(html) == "<p>Kept</p>\n<p>Also kept</p>"
+
+
+class _FakeResponse:
+    def __init__(self, status_code=200, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RequestsError(f"HTTP {self.status_code}")
+
+
+class _FakeNovelSite:
+    """Novel page with an ETag plus an AJAX archive that can be toggled."""
+
+    NOVEL_URL = "https://novelbin.com/b/novel"
+
+    def __init__(self, archive_size):
+        self.archive = self._archive(archive_size)
+        self.page_hits = []
+
+    @staticmethod
+    def _archive(size):
+        links = "".join(
+            f'<li><a href="/b/novel/c-{i}" title="C{i}">C{i}</a></li>'
+            for i in range(1, size + 1)
+        )
+        return f'<ul class="list-chapter">{links}</ul>'
+
+    def set_archive_size(self, size):
+        self.archive = self._archive(size) if size else None
+
+    async def get(self, url, headers=None, timeout=None):
+        if url == self.NOVEL_URL:
+            if (headers or {}).get("If-None-Match") == '"v1"':
+                self.page_hits.append(304)
+                return _FakeResponse(304)
+            self.page_hits.append(200)
+            page = (
+                '<html><body><h1>Novel</h1><div id="rating" data-novel-id="n1"></div>'
+                '<ul class="list-chapter"><li><a href="/b/novel/c-9">C9</a></li></ul>'
+                "</body></html>"
+            )
+            return _FakeResponse(200, page, {"ETag": '"v1"'})
+        if "chapter-archive" in url:
+            if self.archive is None:
+                return _FakeResponse(500)
+            return _FakeResponse(200, self.archive)
+        return _FakeResponse(404)
+
+
+def _metadata_scraper(tmp_path, monkeypatch, site):
+    monkeypatch.setattr(scraper_module, "META_CACHE_TTL", 0)
+    monkeypatch.setattr(scraper_module, "RETRY_DELAY", 0)
+    scraper = AsyncScraper()
+    scraper.cache = CacheStore(tmp_path / "cache.sqlite3")
+    scraper.session = site
+    return scraper
+
+
+def test_extract_metadata_does_not_cache_fallback_chapters(tmp_path, monkeypatch):
+    site = _FakeNovelSite(archive_size=9)
+    site.set_archive_size(0)  # Archive is down on the first call
+    scraper = _metadata_scraper(tmp_path, monkeypatch, site)
+
+    async def run():
+        await scraper.cache.open()
+        first = await scraper.extract_metadata(site.NOVEL_URL)
+        site.set_archive_size(9)
+        second = await scraper.extract_metadata(site.NOVEL_URL)
+        await scraper.cache.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(first[4]) == 1  # Fallback list from the novel page
+    assert len(second[4]) == 9
+    assert site.page_hits == [200, 200]  # No ETag stored for the fallback
+
+
+def test_extract_metadata_refetches_archive_on_304(tmp_path, monkeypatch):
+    site = _FakeNovelSite(archive_size=2)
+    scraper = _metadata_scraper(tmp_path, monkeypatch, site)
+
+    async def run():
+        await scraper.cache.open()
+        first = await scraper.extract_metadata(site.NOVEL_URL)
+        site.set_archive_size(3)
+        second = await scraper.extract_metadata(site.NOVEL_URL)
+        site.set_archive_size(0)
+        third = await scraper.extract_metadata(site.NOVEL_URL)
+        await scraper.cache.close()
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert site.page_hits == [200, 304, 304]
+    assert len(first[4]) == 2
+    assert len(second[4]) == 3  # New chapter picked up despite the 304
+    assert len(third[4]) == 3  # Archive failure falls back to the last good list
+
+
+def test_html_parser_is_per_thread():
+    main_parser = _html_parser()
+    assert _html_parser() is main_parser
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        worker_parser = pool.submit(_html_parser).result()
+    assert worker_parser is not main_parser
+
+
+def test_parse_chapter_archive_ignores_data_attributes():
+    html = (
+        '<ul class="list-chapter">'
+        '<li><a href="/c-1" data-href="/ad" title="C1">C1</a></li>'
+        '<li><a href="/c-2" title="C2" data-title="X">C2</a></li>'
+        "</ul>"
+    )
+    assert AsyncScraper()._parse_chapter_archive(html) == [
+        {"name": "C1", "url": "https://novelbin.com/c-1"},
+        {"name": "C2", "url": "https://novelbin.com/c-2"},
+    ]
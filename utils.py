@@ -1,11 +1,13 @@
 # utils.py
-import re
-from typing import List, Set
+from typing import List
+
+# Characters that are not allowed in filenames (deleted in C via str.translate)
+_FILENAME_TABLE = str.maketrans("", "", '\\/*:?"<>|')
 
 
 def clean_filename(text: str) -> str:
     """Sanitizes strings for use in filenames."""
-    return re.sub(r'[\\/*:?"<>|]', "", text)
+    return text.translate(_FILENAME_TABLE)
 
 
 def parse_chapter_selection(selection: str, total_chapters: int) -> List[int]:
@@ -13,23 +15,23 @@ def parse_chapter_selection(selection: str, total_chapters: int) -> List[int]:
     if not selection.strip():
         return list(range(total_chapters))
 
-    indices: Set[int] = set()
+    # One byte per chapter: ordered and de-duplicated by construction
+    mask = bytearray(total_chapters)
 
     for part in selection.split(","):
         part = part.strip()
         if "-" in part:
             try:
                 start, end = part.split("-", 1)
-                s = int(start) - 1
-                e = int(end)
-                for i in range(s, e):
-                    if 0 <= i < total_chapters:
-                        indices.add(i)
+                s = max(int(start) - 1, 0)
+                e = min(int(end), total_chapters)
+                if s < e:
+                    mask[s:e] = b"\x01" * (e - s)
             except ValueError:
                 continue
         elif part.isdigit():
             i = int(part) - 1
             if 0 <= i < total_chapters:
-                indices.add(i)
+                mask[i] = 1
 
-    return sorted(list(indices))
+    return [i for i in range(total_chapters) if mask[i]]